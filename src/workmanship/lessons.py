@@ -10,18 +10,24 @@ currently for `*workman* layout <https://workmanlayout.org/>`_
 converted hastily from dvorak (so gibberish grams & words).
 
 """
+import argparse
+import cProfile
 import curses
-import datetime
+import getpass
 import importlib.resources as pkg_resources
+import itertools as itt
 import sys
 import time
-from collections import defaultdict
+from bisect import bisect_right
+from collections import Counter, defaultdict
+from math import log2
 from pathlib import Path
 from typing import NamedTuple
 
 from ruamel.yaml import YAML, representer
 
-from . import TerminalError, textmenus
+from . import TerminalError, profiling, recordings, scoreserver, textmenus
+from .scores import Score, Stats
 
 ESC_CHAR = chr(27)
 BREAK_CHAR = chr(3)
@@ -34,10 +40,25 @@ representer.RoundTripRepresenter.add_representer(
 # TODO: use `platformdirs` lib to locate user-prefs.
 prefs_fpath = Path("~/.workmanship.yml").expanduser()
 user_prefs: dict = None  # None is sentinel
+#: When connected, prefs & scores are kept in the server, not in `prefs_fpath`.
+score_client: scoreserver.ScoreClient = None
+#: `(layout, lesson, score)` the score-server failed to receive, re-sent on next call.
+unsent_scores: list[tuple[str, str, Score]] = []
+recordings_fpath = prefs_fpath.with_suffix(".rec")
+#: None if it failed to load, and then lessons are not recorded.
+recordings_archive: recordings.Archive = None
 
 user_nscores = 0
 selected_layout = "Dvorak"
 beep_on_errors = False
+sort_by_difficulty = False
+race_ghost = False
+replay_next = False  # one-shot, for the next lesson selected
+
+#: Typing speed assumed for estimating lesson durations (~36 WPM).
+REFERENCE_CPS = 3.0
+#: Max seconds between ghost redraws, when no keys are pressed.
+GHOST_TICK = 0.05
 
 
 def status_bar(win, txt=None, attr=curses.A_NORMAL, offset=0):
@@ -55,13 +76,48 @@ def cps2wpm(cps):
     return cps / 5.0 * 60
 
 
-class Stats(NamedTuple):
-    cps: float
-    wpm: float
-    hits_ratio: float
-    elapsed: float
-    hits: int
-    misses: int
+class Lesson(NamedTuple):
+    """A lesson pre-processed once at load time, see :func:`index_lessons()`."""
+
+    lines: list[str]  # stripped, each ending with `\n`
+    nchars: int  # to type, including newlines
+    keys: frozenset[str]
+    difficulty: float  # entropy of bigrams, in bits
+    duration: float  # estimated seconds, at `REFERENCE_CPS`
+
+
+def bigrams_entropy(text: str) -> float:
+    """Shannon entropy of the bigrams of `text`: the more varied, the harder."""
+    counts = Counter(a + b for a, b in zip(text, text[1:]))
+    total = sum(counts.values())
+    return -sum(n / total * log2(n / total) for n in counts.values())
+
+
+def make_lesson(text: str) -> Lesson:
+    text = text.strip()
+    assert text
+
+    lines = [f"{l.strip()}\n" for l in text.splitlines()]
+    typed = "".join(lines)
+    nchars = len(typed)
+
+    return Lesson(
+        lines,
+        nchars,
+        frozenset(typed),
+        bigrams_entropy(typed),
+        nchars / REFERENCE_CPS,
+    )
+
+
+def index_lessons(layouts: dict) -> dict:
+    """Replace (in-place) the texts of all `layouts` lessons with :class:`Lesson`."""
+    for layout in layouts.values():
+        layout["lessons"] = {
+            title: make_lesson(text) for title, text in layout["lessons"].items()
+        }
+
+    return layouts
 
 
 def speed_stats(start_time, hits, misses):
@@ -130,12 +186,51 @@ def dump_lesson(win, title, lines, start_y):
         win.addstr(RET_CHAR)
 
 
-def run_typing_lesson(win, title, text) -> tuple:
-    text = text.strip()
-    assert text
+class Ghost:
+    """An underlined cursor typing a past :class:`.recordings.Recording` along."""
 
-    lines = [f"{l.strip()}\n" for l in text.splitlines()]
-    nchars_to_type = sum([len(l) for l in lines])
+    def __init__(self, win, recording, lines, start_y):
+        self.win = win
+        self.hit_times = [t for t, hit in recording.timeline() if hit]
+        self.line_ends = list(itt.accumulate(len(l) for l in lines))
+        self.start_y = start_y
+        self.pos = None  # (y, x) drawn
+        self.due = 0  # elapsed time for next redraw
+
+    def locate(self, elapsed) -> tuple[int, int] | None:
+        nhits = bisect_right(self.hit_times, elapsed)
+        row = bisect_right(self.line_ends, nhits)
+        if row >= len(self.line_ends):
+            return None  # Ghost finished.
+        x = nhits - (self.line_ends[row - 1] if row else 0)
+
+        return (self.start_y + row, x)
+
+    def draw(self, elapsed, cursor: tuple[int, int]):
+        """Move ghost, unless on user's `cursor`, which always wins."""
+        self.due = elapsed + GHOST_TICK
+        pos = self.locate(elapsed)
+        if pos == self.pos:
+            return
+
+        if self.pos and self.pos != cursor:
+            self.win.chgat(*self.pos, 1, curses.A_NORMAL)
+        if pos and pos != cursor:
+            self.win.chgat(*pos, 1, curses.A_UNDERLINE)
+        self.pos = pos
+
+
+def run_typing_lesson(
+    win, title, lesson: Lesson, timeline: list = None, ghost=None
+) -> tuple:
+    """
+    :param timeline:
+        if given, `(elapsed, hit)` of each keystroke are appended there
+    :param ghost:
+        a :class:`.recordings.Recording` to race against
+    """
+    lines = lesson.lines
+    nchars_to_type = lesson.nchars
 
     win.erase()
     curses.noecho()
@@ -158,58 +253,133 @@ def run_typing_lesson(win, title, text) -> tuple:
     pause_time = 0  # Used also as a flag if ESC has been pressed.
     stats = dump_stats(win, start_time, hits, misses, nchars_to_type)
 
-    while True:
-        c = win.get_wch()
-        if y >= start_y + len(lines):
-            return stats
-
-        if c == curses.KEY_RESIZE:
-            if dump_lesson(win, lines, start_y):
-                break  # ESC pressed
-            win.chgat(y, x, 1, curses.A_REVERSE)
+    if ghost:
+        ghost = Ghost(win, ghost, lines, start_y)
+        # Redraw ghost mostly while idle, not to delay echoing user's keys.
+        win.timeout(round(GHOST_TICK * 1000))
+    key_echo_samples = profiling.sampler(profiling.KEY_ECHO)
+
+    with profiling.counting_curses():
+        while True:
+            try:
+                c = win.get_wch()
+            except curses.error:  # Timed-out, no key pressed.
+                if not ghost:
+                    raise  # Blocking read cannot time out.
+                if not pause_time:
+                    ghost.draw(time.time() - start_time, (y, x))
+                continue
+            if key_echo_samples is not None:
+                key_time = time.perf_counter_ns()
+            if y >= start_y + len(lines):
+                win.timeout(-1)
+                return stats
+
+            if c == curses.KEY_RESIZE:
+                if dump_lesson(win, lines, start_y):
+                    break  # ESC pressed
+                win.chgat(y, x, 1, curses.A_REVERSE)
 
-        if c == ESC_CHAR:
-            if pause_time:
-                break  # User abandoned lesson by pressing ESC x2.
+            if c == ESC_CHAR:
+                if pause_time:
+                    break  # User abandoned lesson by pressing ESC x2.
+                else:
+                    pause_time = time.time()
+                    status_bar(
+                        win,
+                        "Press ESC to return to main menu, any other key to continue",
+                        curses.A_ITALIC,
+                        offset=1,
+                    )
+            elif pause_time:  # User pressed any key after ESC
+                status_bar(win, offset=1)
+                start_time += time.time() - pause_time
+                pause_time = 0
             else:
-                pause_time = time.time()
-                status_bar(
-                    win,
-                    "Press ESC to return to main menu, any other key to continue",
-                    curses.A_ITALIC,
-                    offset=1,
-                )
-        elif pause_time:  # User pressed any key after ESC
-            status_bar(win, offset=1)
-            start_time += time.time() - pause_time
-            pause_time = 0
-        else:
-            row = lines[y - start_y]
-            if c == chr(curses.KEY_RESIZE):  # Does it work?
-                pass
-            elif row[x] != c:
+                row = lines[y - start_y]
+                if c == chr(curses.KEY_RESIZE):  # Does it work?
+                    pass
+                elif row[x] != c:
+                    misses += 1
+                    if timeline is not None:
+                        timeline.append((time.time() - start_time, False))
+                    if beep_on_errors:
+                        curses.beep()
+                else:
+                    hits += 1
+                    if timeline is not None:
+                        timeline.append((time.time() - start_time, True))
+                    if x >= 0:
+                        win.chgat(y, x, 1, curses.A_NORMAL)
+                    x += 1
+                    if x >= len(row):
+                        y += 1
+                        x = 0
+                        if y >= start_y + len(lines):
+                            status_bar(
+                                win,
+                                "Press any key to return to main menu",
+                                curses.A_ITALIC,
+                                offset=1,
+                            )
+                    win.chgat(y, x, 1, curses.A_REVERSE)
+
+            stats = dump_stats(win, start_time, hits, misses, nchars_to_type)
+            if ghost and not pause_time and (elapsed := stats.elapsed) >= ghost.due:
+                ghost.draw(elapsed, (y, x))
+            win.move(y, x)
+            if key_echo_samples is not None:
+                key_echo_samples.append(time.perf_counter_ns() - key_time)
+
+    win.timeout(-1)
+
+
+def replay_lesson(win, title, lesson: Lesson, recording) -> None:
+    """Animate the keystrokes of a :class:`.recordings.Recording`, ESC to stop."""
+    lines = lesson.lines
+
+    win.erase()
+    curses.noecho()
+    curses.curs_set(False)
+
+    start_y = 2
+    if dump_lesson(win, title, lines, start_y):
+        return  # ESC pressed
+
+    status_bar(win, "Replaying personal best, ESC to stop", curses.A_ITALIC, offset=1)
+    x = 0
+    y = start_y
+    hits = misses = 0
+    win.chgat(y, x, 1, curses.A_REVERSE)
+    start_time = time.time()
+    try:
+        for t, hit in recording.timeline():
+            # Sleep till keystroke is due, but listen for ESC meanwhile.
+            while (wait := t - (time.time() - start_time)) > 0:
+                win.timeout(max(1, round(wait * 1000)))
+                try:
+                    if win.get_wch() == ESC_CHAR:
+                        return
+                except curses.error:  # Timed-out.
+                    pass
+
+            if not hit:
                 misses += 1
-                if beep_on_errors:
-                    curses.beep()
             else:
                 hits += 1
-                if x >= 0:
-                    win.chgat(y, x, 1, curses.A_NORMAL)
+                win.chgat(y, x, 1, curses.A_NORMAL)
                 x += 1
-                if x >= len(row):
+                if x >= len(lines[y - start_y]):
                     y += 1
                     x = 0
-                    if y >= start_y + len(lines):
-                        status_bar(
-                            win,
-                            "Press any key to return to main menu",
-                            curses.A_ITALIC,
-                            offset=1,
-                        )
-                win.chgat(y, x, 1, curses.A_REVERSE)
+                if y < start_y + len(lines):
+                    win.chgat(y, x, 1, curses.A_REVERSE)
+            dump_stats(win, start_time, hits, misses, lesson.nchars)
+    finally:
+        win.timeout(-1)
 
-        stats = dump_stats(win, start_time, hits, misses, nchars_to_type)
-        win.move(y, x)
+    status_bar(win, "Press any key to return to main menu", curses.A_ITALIC, offset=1)
+    win.get_wch()
 
 
 def toggle_beep_on_errors_cb(_):
@@ -222,6 +392,39 @@ def toggle_beep_on_errors_cb(_):
     )
 
 
+def toggle_sort_by_difficulty_cb(_):
+    global sort_by_difficulty
+
+    sort_by_difficulty = not sort_by_difficulty
+    return (
+        f"Toggled sort lessons by difficulty, from {not sort_by_difficulty}"
+        f" -> {sort_by_difficulty}",
+        curses.A_ITALIC,
+    )
+
+
+def toggle_race_ghost_cb(_):
+    global race_ghost
+
+    race_ghost = not race_ghost
+    return (
+        f"Toggled race personal best, from {not race_ghost} -> {race_ghost}",
+        curses.A_ITALIC,
+    )
+
+
+def toggle_replay_next_cb(_):
+    global replay_next
+
+    replay_next = not replay_next
+    return (
+        "Select a lesson to replay its personal best"
+        if replay_next
+        else "Cancelled replay",
+        curses.A_ITALIC,
+    )
+
+
 def select_layout_cb(layout):
     global selected_layout
 
@@ -234,22 +437,48 @@ def select_layout_cb(layout):
 
 def lessons_menu(win, layouts, *, prompt_y=0, titles_y=2) -> bool:
     """Return true for parent loop to exit, false to continue."""
-    scores = user_prefs.get("game_scores") or {}
-    scores = scores.get(selected_layout) or {}
+    server_error = None
+    if score_client:
+        try:
+            send_unsent_scores()
+            scores = score_client.visited(selected_layout)
+        except scoreserver.ScoreServerError as ex:
+            scores, server_error = set(), ex
+    else:
+        scores = user_prefs.get("game_scores") or {}
+        scores = scores.get(selected_layout) or {}
 
     def mark_selected(txt, flag):
         return (txt, curses.A_BOLD if flag else curses.A_NORMAL)
 
     def mark_visited(title):
-        visited = scores.get(title, 0)
         return (title, curses.A_UNDERLINE if title in scores else curses.A_NORMAL)
 
+    lessons = layouts[selected_layout]["lessons"].items()
+    if sort_by_difficulty:
+        lessons = sorted(lessons, key=lambda item: item[1].difficulty)
+
     menu = textmenus.Menu(
         (
             "b",
             mark_selected(f"Beep on errors", beep_on_errors),
             toggle_beep_on_errors_cb,
         ),
+        (
+            "o",
+            mark_selected(f"Order by difficulty", sort_by_difficulty),
+            toggle_sort_by_difficulty_cb,
+        ),
+        (
+            "g",
+            mark_selected(f"Race personal best (ghost)", race_ghost),
+            toggle_race_ghost_cb,
+        ),
+        (
+            "r",
+            mark_selected(f"Replay personal best", replay_next),
+            toggle_replay_next_cb,
+        ),
         *[
             (
                 layout["key"],
@@ -261,12 +490,14 @@ def lessons_menu(win, layouts, *, prompt_y=0, titles_y=2) -> bool:
         (("s", "store prefs + scores"), store_user_prefs_cb),
         (("q", "Quit"), None),
         *[
-            (mark_visited(title), text)
-            for title, text in layouts[selected_layout]["lessons"].items()
+            (mark_visited(title), lesson)
+            for title, lesson in lessons
         ],
     )
 
     menu.dump_rows(win, titles_y)
+    if server_error:
+        status_bar(win, *score_server_error_msg(server_error))
 
     win.addstr(prompt_y, 0, f"Type a lesson number/selection? ", curses.A_ITALIC)
     win.clrtoeol()
@@ -290,9 +521,38 @@ def lessons_menu(win, layouts, *, prompt_y=0, titles_y=2) -> bool:
             statusbar_args = action(title)
             status_bar(win, *(statusbar_args or ()))
         else:
-            game_stats = run_typing_lesson(win, title, action)
-            update_game_scores(title, game_stats)
+            play_lesson(win, title, action)
+
+
+def play_lesson(win, title, lesson: Lesson):
+    global replay_next
+
+    best = recordings_archive and recordings_archive.best_of(selected_layout, title)
+    if replay_next:
+        replay_next = False
+        if best:
+            replay_lesson(win, title, lesson, best)
             win.erase()
+        else:
+            status_bar(win, f"No recording of {title!r} to replay", curses.A_BOLD)
+        return
+
+    timeline = []
+    game_stats = run_typing_lesson(
+        win, title, lesson, timeline, ghost=best if race_ghost else None
+    )
+    win.erase()
+    try:
+        update_game_scores(title, game_stats)
+        if game_stats and score_client:
+            status_bar(win, leaderboard_msg(title), curses.A_ITALIC)
+    except scoreserver.ScoreServerError as ex:
+        status_bar(win, *score_server_error_msg(ex))
+    if game_stats and recordings_archive:
+        try:
+            record_lesson(title, game_stats, timeline)
+        except (OSError, ValueError) as ex:
+            status_bar(win, f"Recording not saved: {ex}", curses.A_BOLD, offset=1)
 
 
 def typing_tutorial(win, layouts):
@@ -323,14 +583,19 @@ def _game_scores_factory(*args):
 
 
 def load_user_prefs(avail_layouts) -> dict:
-    global user_prefs, beep_on_errors, selected_layout
+    global user_prefs, beep_on_errors, sort_by_difficulty, race_ghost, selected_layout
 
-    yaml = YAML(typ="rt")
-    try:
-        with open(prefs_fpath, "rt") as f:
-            prefs = yaml.load(f)
-    except FileNotFoundError:
-        pass
+    # Safe-load is faster & lighter than round-trip (no `CommentedMap`)
+    yaml = YAML(typ="safe")
+    prefs = None
+    if score_client:
+        prefs = score_client.get_prefs()
+    else:
+        try:
+            with open(prefs_fpath, "rt") as f:
+                prefs = yaml.load(f)
+        except FileNotFoundError:
+            pass
 
     if not prefs:
         prefs = {}
@@ -343,12 +608,19 @@ def load_user_prefs(avail_layouts) -> dict:
     prefs["game_scores"] = defaultdict(
         _game_scores_factory,
         {
-            layout: _game_scores_factory(lessons)
+            layout: _game_scores_factory(
+                {
+                    lesson: [Score.from_dict(run) for run in runs]
+                    for lesson, runs in lessons.items()
+                }
+            )
             for layout, lessons in stored_scores.items()
         },
     )
 
     beep_on_errors = prefs.get("beep_on_errors", False)
+    sort_by_difficulty = prefs.get("sort_by_difficulty", False)
+    race_ghost = prefs.get("race_ghost", False)
     layout = prefs.get("selected_layout")
     if layout in avail_layouts:
         selected_layout = layout
@@ -360,13 +632,41 @@ def store_user_prefs() -> str:
     global user_nscores
 
     user_prefs["beep_on_errors"] = beep_on_errors
+    user_prefs["sort_by_difficulty"] = sort_by_difficulty
+    user_prefs["race_ghost"] = race_ghost
     user_prefs["selected_layout"] = selected_layout
 
+    if score_client:
+        # Scores were sent as they came, just ask the server to write them.
+        send_unsent_scores()
+        score_client.store_prefs(
+            {k: v for k, v in user_prefs.items() if k != "game_scores"}
+        )
+        score_client.flush()
+        msg = (
+            f"Stored x{user_nscores} new scores of '{score_client.profile}'"
+            f" in score-server '{score_client.address}'"
+        )
+        user_nscores = 0
+
+        return msg
+
     tmp_fpath = prefs_fpath.with_suffix(".tmp")
 
+    prefs = {
+        **user_prefs,
+        "game_scores": {
+            layout: {
+                lesson: [score.to_dict() for score in scores]
+                for lesson, scores in lessons.items()
+            }
+            for layout, lessons in user_prefs["game_scores"].items()
+        },
+    }
+
     yaml = YAML(typ="rt")
     with open(tmp_fpath, "wt") as f:
-        yaml.dump(user_prefs, f)
+        yaml.dump(prefs, f)
 
     try:
         prefs_fpath.rename(prefs_fpath.with_suffix(".bak.yml"))
@@ -384,28 +684,155 @@ def store_user_prefs() -> str:
 
 
 def store_user_prefs_cb(_):
-    return (store_user_prefs(), curses.A_ITALIC)
+    try:
+        return (store_user_prefs(), curses.A_ITALIC)
+    except scoreserver.ScoreServerError as ex:
+        return score_server_error_msg(ex)
+
+
+def score_server_error_msg(ex) -> tuple[str, int]:
+    return (f"Score-server failed, will retry: {ex}", curses.A_BOLD)
 
 
 def update_game_scores(lesson, stats: Stats | None):
     global user_nscores
 
     if stats:
-        user_prefs["game_scores"][selected_layout][lesson].append(
-            {"date": datetime.datetime.now(), **stats._asdict()}
-        )
+        score = Score(time.time(), *stats)
+        user_prefs["game_scores"][selected_layout][lesson].append(score)
         user_nscores += 1
+        if score_client:
+            unsent_scores.append((selected_layout, lesson, score))
+            send_unsent_scores()
+
+
+def send_unsent_scores():
+    """:raise ScoreServerError: keeping the scores not sent yet"""
+    while unsent_scores:
+        layout, lesson, score = unsent_scores[0]
+        score_client.add_score(layout, lesson, score._asdict())
+        unsent_scores.pop(0)
+
+
+def player_recordings_fpath() -> Path:
+    """Separate archives per score-server player, to race their own bests."""
+    if score_client:
+        # Player validated by the server, when prefs were loaded.
+        return recordings_fpath.with_suffix(f".{score_client.profile}.rec")
+    return recordings_fpath
+
+
+def record_lesson(lesson, stats: Stats, timeline: list):
+    """Append the keystrokes of a completed lesson in the recordings archive."""
+    recording = recordings.Recording(
+        time.time(),
+        stats.elapsed,
+        stats.hits,
+        stats.misses,
+        recordings.encode_timeline(timeline),
+    )
+    recordings_archive.append(selected_layout, lesson, recording)
+
+
+def leaderboard_msg(lesson, n=3) -> str:
+    board = score_client.leaderboard(selected_layout, lesson, n)
+    ranks = ", ".join(
+        f"#{rank} {name} WPM {wpm:.2f}"
+        for rank, (name, wpm, _hits_ratio) in enumerate(board, start=1)
+    )
+    return f"Best of {lesson!r}: {ranks}"
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog=__package__, description=__doc__.strip().splitlines()[0]
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="time hot-paths & count curses calls, print a summary on exit",
+    )
+    parser.add_argument(
+        "--profile-out",
+        metavar="FILE",
+        help="also write cProfile stats into FILE, for `pstats` (implies --profile)",
+    )
+    parser.add_argument(
+        "--score-server",
+        metavar="SOCKET",
+        help="keep prefs & scores in the `workmanship-scoreserver` listening there",
+    )
+    parser.add_argument(
+        "--player",
+        default=getpass.getuser(),
+        help="profile name in the score-server (default: %(default)s)",
+    )
+    return parser.parse_args(argv)
 
 
 def main(*args):
-    # TODO: parse CLI args
-    data = load_lessons()
-    layouts = data["layouts"]
-    load_user_prefs(layouts)
+    global score_client, recordings_archive
+
+    # `__main__` passes `sys.argv`, console-script nothing.
+    opts = parse_args(args[1:] if args else sys.argv[1:])
+    profile = opts.profile or opts.profile_out
+    tutorial = typing_tutorial
+    profiler = None
+    if profile:
+        profiling.enable()
+        profiling.instrument(
+            sys.modules[__name__], "run_typing_lesson", decorator=profiling.counted
+        )
+        profiling.instrument(
+            sys.modules[__name__],
+            "dump_stats",
+            "load_lessons",
+            "index_lessons",
+            "store_user_prefs",
+        )
+        profiling.instrument(textmenus, "tabulate")
+        tutorial = profiling.count_curses_calls(tutorial)
+        if opts.profile_out:
+            profiler = cProfile.Profile()
+            profiler.enable()
+
+    if opts.score_server:
+        try:
+            score_client = scoreserver.ScoreClient(opts.score_server, opts.player)
+        except OSError as ex:
+            raise SystemExit(f"Cannot connect to score-server: {ex}")
+
     try:
-        curses.wrapper(typing_tutorial, layouts)
-        print(store_user_prefs(), file=sys.stderr)
-    except KeyboardInterrupt:
+        data = load_lessons()
+        layouts = index_lessons(data["layouts"])
+        load_user_prefs(layouts)
+        try:
+            recordings_archive = recordings.Archive(player_recordings_fpath())
+        except (OSError, ValueError) as ex:
+            print(f"Lessons not recorded, archive failed: {ex}", file=sys.stderr)
+        try:
+            curses.wrapper(tutorial, layouts)
+            print(store_user_prefs(), file=sys.stderr)
+        except KeyboardInterrupt:
+            if score_client:
+                # Sent scores are kept by the server, prefs only when stored.
+                raise SystemExit(
+                    f"Ctrl+C, exit without storing prefs"
+                    f" & x{len(unsent_scores)} unsent scores to score-server"
+                )
+            raise SystemExit(
+                f"Ctrl+C, exit without saving x{user_nscores} new scores in prefs"
+            )
+    except scoreserver.ScoreServerError as ex:
         raise SystemExit(
-            f"Ctrl+C, exit without saving x{user_nscores} new scores in prefs"
+            f"Score-server failed, exit without saving prefs"
+            f" & x{len(unsent_scores)} unsent scores: {ex}"
         )
+    finally:
+        if score_client:
+            score_client.close()
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(opts.profile_out)
+        if profile:
+            print(profiling.summary(), file=sys.stderr)
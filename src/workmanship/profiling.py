@@ -0,0 +1,150 @@
+"""
+Opt-in timers & counters for the hot-paths, enabled with the ``--profile`` flag.
+
+Nothing here is imported into the hot-paths unless :func:`instrument()` is called,
+so the normal game runs without any overhead; inline timers in hot loops
+check :func:`sampler()` once, before entering them.
+"""
+import contextlib
+import functools
+import time
+from collections import Counter, defaultdict
+
+#: {funcname: [elapsed_ns, ...]}
+timings: dict[str, list[int]] = defaultdict(list)
+#: {curses-window-method: ncalls}, only while :func:`counting_curses()`
+curses_calls: Counter = Counter()
+#: {funcname: ncalls}, for long-running functions, where latencies mean nothing
+calls: Counter = Counter()
+#: Set by :func:`enable()`.
+enabled = False
+#: Switched by :func:`counting_curses()`.
+counting = False
+#: The name of the inline timer from key-press till its echo.
+KEY_ECHO = "keystroke->echo"
+
+
+def enable():
+    global enabled
+
+    enabled = True
+
+
+def sampler(name) -> list[int] | None:
+    """The list to append elapsed-ns of an inline timer, None if not profiling."""
+    return timings[name] if enabled else None
+
+
+@contextlib.contextmanager
+def counting_curses():
+    """Count window calls only within this block (a lesson loop), if enabled."""
+    global counting
+
+    counting = enabled
+    try:
+        yield
+    finally:
+        counting = False
+
+
+def timed(func):
+    """Decorate `func` to collect its elapsed times (monotonic) in :data:`timings`."""
+    samples = timings[func.__qualname__]
+    clock = time.perf_counter_ns
+
+    @functools.wraps(func)
+    def wrapper(*args, **kw):
+        start = clock()
+        try:
+            return func(*args, **kw)
+        finally:
+            samples.append(clock() - start)
+
+    return wrapper
+
+
+def counted(func):
+    """Decorate `func` to count its calls in :data:`calls`."""
+    name = func.__qualname__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kw):
+        calls[name] += 1
+        return func(*args, **kw)
+
+    return wrapper
+
+
+def instrument(module, *names, decorator=timed):
+    """Replace the named functions of `module` with :func:`timed` ones (or other)."""
+    for name in names:
+        setattr(module, name, decorator(getattr(module, name)))
+
+
+class CountingWindow:
+    """Proxy a curses window, counting its method calls into :data:`curses_calls`."""
+
+    def __init__(self, win):
+        self._win = win
+
+    def __getattr__(self, name):
+        attr = getattr(self._win, name)
+        if not callable(attr):
+            return attr
+
+        def counted(*args, **kw):
+            result = attr(*args, **kw)
+            if counting:
+                curses_calls[name] += 1  # Skip timed-out `get_wch()` (no keystroke).
+            return result
+
+        setattr(self, name, counted)  # Next lookups skip `__getattr__()`.
+        return counted
+
+
+def count_curses_calls(func):
+    """Decorate a :func:`curses.wrapper()` target to count its window calls."""
+
+    @functools.wraps(func)
+    def wrapper(win, *args, **kw):
+        return func(CountingWindow(win), *args, **kw)
+
+    return wrapper
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of `samples` (need not be sorted)."""
+    if not samples:
+        return 0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def summary() -> str:
+    lines = [f"{'function':<24} {'calls':>7} {'p50(ms)':>9} {'p99(ms)':>9}"]
+    for name, samples in timings.items():
+        if samples:
+            lines.append(
+                f"{name:<24} {len(samples):>7}"
+                f" {percentile(samples, 50) / 1e6:>9.3f}"
+                f" {percentile(samples, 99) / 1e6:>9.3f}"
+            )
+
+    for name, ncalls in calls.items():
+        lines.append(f"{name:<24} {ncalls:>7}")
+
+    nkeys = curses_calls["get_wch"]
+    ncalls = sum(curses_calls.values())
+    lines.append(f"curses calls in lessons: {ncalls}, keystrokes: {nkeys}")
+    if nkeys:
+        lines.append(f"curses calls per keystroke: {ncalls / nkeys:.1f}")
+
+    return "\n".join(lines)
+
+
+def reset():
+    for samples in timings.values():
+        samples.clear()  # Keep lists, referenced by :func:`timed` wrappers.
+    curses_calls.clear()
+    calls.clear()
@@ -0,0 +1,168 @@
+"""
+Keystroke timelines of completed lessons, to replay them or race against them.
+
+A timeline is a sequence of ``(seconds since start, hit)`` keystrokes,
+stored delta-encoded: each keystroke is the varint (LEB128) of
+``delta_msec << 1 | hit``, so most keystrokes take 1-2 bytes.
+
+Recordings are appended into a single archive file (never rewritten), like::
+
+    MAGIC
+    HEADER key-bytes events-bytes
+    HEADER key-bytes events-bytes
+    ...
+
+The archive is memory-mapped on load, and only the headers are scanned
+to index the personal-best recording of each lesson; their events are decoded
+lazily, straight from the mapped memory.
+
+Many sessions may append into the same archive, each one locking it (on POSIX)
+and indexing first any recordings appended by the others.
+"""
+import mmap
+import struct
+from pathlib import Path
+from typing import Iterable, Iterator, NamedTuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+MAGIC = b"WMREC\x01"
+#: date, elapsed, hits, misses, key-len, events-len
+HEADER = struct.Struct("<dfIIHI")
+
+
+def encode_timeline(timeline: Iterable[tuple[float, bool]]) -> bytes:
+    out = bytearray()
+    prev_msec = 0
+    for t, hit in timeline:
+        msec = max(prev_msec, round(t * 1000))
+        value = (msec - prev_msec) << 1 | bool(hit)
+        prev_msec = msec
+        while value >= 0x80:
+            out.append(value & 0x7F | 0x80)
+            value >>= 7
+        out.append(value)
+
+    return bytes(out)
+
+
+def decode_timeline(events: bytes | memoryview) -> Iterator[tuple[float, bool]]:
+    msec = value = shift = 0
+    for byte in events:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        msec += value >> 1
+        yield msec / 1000, bool(value & 1)
+        value = shift = 0
+
+
+class Recording(NamedTuple):
+    date: float  # epoch seconds
+    elapsed: float  # seconds
+    hits: int
+    misses: int
+    events: bytes | memoryview  # see :func:`encode_timeline()`
+
+    def timeline(self) -> Iterator[tuple[float, bool]]:
+        return decode_timeline(self.events)
+
+
+def _key(layout, lesson) -> bytes:
+    return f"{layout}\0{lesson}".encode("utf-8")
+
+
+class Archive:
+    """The personal-best :class:`Recording` of each lesson, memory-mapped."""
+
+    def __init__(self, fpath):
+        self.fpath = Path(fpath)
+        self.best: dict[bytes, Recording] = {}
+        self._mmap = None
+        self._nbytes = 0  # till the end of the last intact recording
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.fpath, "rb") as f:
+                if not f.seek(0, 2):
+                    return  # `mmap` fails on empty files.
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            return
+
+        buf = memoryview(self._mmap)
+        self._check_magic(buf)
+        self._nbytes = self._scan(buf, len(MAGIC))
+
+    def _check_magic(self, buf):
+        if buf[: len(MAGIC)] != MAGIC:
+            raise ValueError(f"Invalid recordings archive: {self.fpath}")
+
+    def _scan(self, buf, offset) -> int:
+        """Index recordings in `buf` from `offset`, return end of the last intact."""
+        end = offset
+        while offset + HEADER.size <= len(buf):
+            date, elapsed, hits, misses, key_len, events_len = HEADER.unpack_from(
+                buf, offset
+            )
+            key_start = offset + HEADER.size
+            events_start = key_start + key_len
+            offset = events_start + events_len
+            if offset > len(buf):
+                break  # Truncated by a crash while appending, ignore it.
+            end = offset
+
+            self._keep_best(
+                bytes(buf[key_start:events_start]),
+                Recording(date, elapsed, hits, misses, buf[events_start:offset]),
+            )
+
+        return end
+
+    def _keep_best(self, key: bytes, recording: Recording):
+        best = self.best.get(key)
+        if not best or recording.elapsed < best.elapsed:
+            self.best[key] = recording
+
+    def best_of(self, layout, lesson) -> Recording | None:
+        return self.best.get(_key(layout, lesson))
+
+    def append(self, layout, lesson, recording: Recording):
+        key = _key(layout, lesson)
+        events = bytes(recording.events)
+        with open(self.fpath, "a+b") as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)  # released on close
+            self._sync_tail(f)
+            f.write(HEADER.pack(*recording[:-1], len(key), len(events)))
+            f.write(key)
+            f.write(events)
+            self._nbytes = f.tell()
+
+        self._keep_best(key, recording._replace(events=events))
+
+    def _sync_tail(self, f):
+        """Index recordings appended by other sessions, drop any truncated tail."""
+        size = f.seek(0, 2)
+        if not size:
+            f.write(MAGIC)
+            return
+        if size == self._nbytes:
+            return
+
+        start = self._nbytes
+        f.seek(start)
+        tail = memoryview(f.read())
+        if not start:  # Created after our load.
+            self._check_magic(tail)
+            start = len(MAGIC)
+            tail = tail[start:]
+        end = start + self._scan(tail, 0)
+        if end < size:
+            # With the lock held, no other session is appending it.
+            f.truncate(end)
@@ -0,0 +1,52 @@
+"""
+Game-score records, shared by the curses game and the score-server (no curses here).
+"""
+import datetime
+import math
+from typing import NamedTuple
+
+
+class Stats(NamedTuple):
+    cps: float
+    wpm: float
+    hits_ratio: float
+    elapsed: float
+    hits: int
+    misses: int
+
+
+class Score(NamedTuple):
+    """A game-score, compact in memory; dicts with datetimes only in prefs-file."""
+
+    date: float  # epoch seconds
+    cps: float
+    wpm: float
+    hits_ratio: float
+    elapsed: float
+    hits: int
+    misses: int
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "Score":
+        """:raise ValueError: on missing or non-numeric fields"""
+        try:
+            date = d["date"]
+            if isinstance(date, datetime.datetime):
+                date = date.timestamp()
+            score = cls(date, *(d[k] for k in Stats._fields))
+        except (KeyError, TypeError) as ex:
+            raise ValueError(f"Invalid score: {d!r}") from ex
+
+        if not all(
+            isinstance(v, (int, float)) and not isinstance(v, bool) and math.isfinite(v)
+            for v in score
+        ):
+            raise ValueError(f"Invalid score: {d!r}")
+
+        return score
+
+    def to_dict(self) -> dict:
+        return {
+            "date": datetime.datetime.fromtimestamp(self.date),
+            **{k: getattr(self, k) for k in Stats._fields},
+        }
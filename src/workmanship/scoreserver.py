@@ -0,0 +1,333 @@
+"""
+A local daemon owning prefs & game-scores of many named player profiles.
+
+Shared training stations run one server on a Unix socket, and the curses clients
+launched with ``--score-server <socket>`` talk to it, instead of each one
+rewriting its own ``~/.workmanship.yml``::
+
+    workmanship-scoreserver /run/workmanship.sock --datadir /var/lib/workmanship
+    workmanship --score-server /run/workmanship.sock --player ann
+
+All profiles are loaded once when the server starts, scores are appended
+in memory and written to ``<datadir>/<player>.yml`` files in batches,
+every few seconds (and on exit).
+
+The protocol is newline-delimited JSON: requests are ``{"op": ..., **kwargs}``
+objects, replies are ``{"ok": <result>}`` or ``{"error": <message>}``.
+Score-records travel as dicts, like those in the prefs file, but with ``date``
+in epoch seconds; in memory they are kept as compact :class:`.scores.Score` tuples,
+and profile files store them exactly like ``~/.workmanship.yml`` (which may be
+copied there).
+"""
+import argparse
+import json
+import re
+import signal
+import socket
+import socketserver
+import sys
+import threading
+from pathlib import Path
+
+from ruamel.yaml import YAML
+
+from .scores import Score
+
+PROFILE_REGEX = re.compile(r"^\w[\w.-]*$")
+
+
+class ScoreServerError(Exception):
+    pass
+
+
+def _load_scores(prefs: dict) -> dict:
+    """Convert (in-place) the score dicts of a profile-file into :class:`Score`."""
+    for lessons in (prefs.get("game_scores") or {}).values():
+        for scores in lessons.values():
+            scores[:] = [Score.from_dict(s) for s in scores]
+
+    return prefs
+
+
+def _dump_scores(prefs: dict) -> dict:
+    """A copy of profile `prefs`, with scores as dicts, like the prefs-file."""
+    return {
+        **prefs,
+        "game_scores": {
+            layout: {
+                lesson: [score.to_dict() for score in scores]
+                for lesson, scores in lessons.items()
+            }
+            for layout, lessons in (prefs.get("game_scores") or {}).items()
+        },
+    }
+
+
+class ScoreStore:
+    """In-memory prefs & scores of all profiles, flushed into `datadir` files."""
+
+    def __init__(self, datadir):
+        self.datadir = Path(datadir)
+        self.datadir.mkdir(parents=True, exist_ok=True)
+        self.profiles: dict[str, dict] = {}
+        self.dirty: set[str] = set()
+        self.lock = threading.RLock()
+        #: Serializes flushes, so older snapshots never overwrite newer ones.
+        self._flush_lock = threading.Lock()
+
+        yaml = YAML(typ="safe")
+        for fpath in self.datadir.glob("*.yml"):
+            with open(fpath, "rt") as f:
+                self.profiles[fpath.stem] = _load_scores(yaml.load(f) or {})
+
+    def _profile(self, profile: str) -> dict:
+        if not isinstance(profile, str) or not PROFILE_REGEX.match(profile):
+            raise ScoreServerError(f"Invalid profile: {profile!r}")
+        return self.profiles.setdefault(profile, {})
+
+    def get_prefs(self, profile) -> dict:
+        with self.lock:
+            prefs = self._profile(profile)
+            return {k: v for k, v in prefs.items() if k != "game_scores"}
+
+    def store_prefs(self, profile, prefs: dict):
+        with self.lock:
+            self._profile(profile).update(
+                {k: v for k, v in prefs.items() if k != "game_scores"}
+            )
+            self.dirty.add(profile)
+
+    def add_score(self, profile, layout, lesson, score: dict):
+        try:
+            score = Score.from_dict(score)
+        except ValueError as ex:
+            raise ScoreServerError(str(ex)) from None
+        with self.lock:
+            scores = self._profile(profile).setdefault("game_scores", {})
+            scores.setdefault(layout, {}).setdefault(lesson, []).append(score)
+            self.dirty.add(profile)
+
+    def _lesson_scores(self, profile, layout, lesson) -> list[Score]:
+        scores = self._profile(profile).get("game_scores") or {}
+        return (scores.get(layout) or {}).get(lesson) or []
+
+    def visited(self, profile, layout) -> list[str]:
+        with self.lock:
+            scores = self._profile(profile).get("game_scores") or {}
+            return list(scores.get(layout) or ())
+
+    def progress(self, profile, layout, lesson) -> list[tuple[float, float, float]]:
+        """The `(date, wpm, hits_ratio)` of all `profile` runs of a lesson."""
+        with self.lock:
+            return [
+                (s.date, s.wpm, s.hits_ratio)
+                for s in self._lesson_scores(profile, layout, lesson)
+            ]
+
+    def leaderboard(self, layout, lesson, n=10) -> list[tuple[str, float, float]]:
+        """The `(profile, wpm, hits_ratio)` of the best runs of each profile."""
+        board = []
+        with self.lock:
+            for profile in self.profiles:
+                if scores := self._lesson_scores(profile, layout, lesson):
+                    wpm, ratio = max((s.wpm, s.hits_ratio) for s in scores)
+                    board.append((profile, wpm, ratio))
+        board.sort(key=lambda i: i[1:], reverse=True)
+
+        return board[:n]
+
+    def flush(self) -> int:
+        """Write the modified profiles, return how many."""
+        with self._flush_lock:
+            # Only snapshot while blocking requests, write without blocking them.
+            with self.lock:
+                dirty, self.dirty = self.dirty, set()
+                snapshots = {p: _dump_scores(self.profiles[p]) for p in dirty}
+
+            yaml = YAML(typ="rt")  # keeps order of lessons
+            for profile, prefs in snapshots.items():
+                fpath = self.datadir / f"{profile}.yml"
+                tmp_fpath = fpath.with_suffix(".tmp")
+                try:
+                    with open(tmp_fpath, "wt") as f:
+                        yaml.dump(prefs, f)
+                    tmp_fpath.replace(fpath)
+                except Exception:
+                    with self.lock:
+                        self.dirty.add(profile)  # Retry on next flush.
+                    raise
+
+        return len(dirty)
+
+
+class ScoreRequestHandler(socketserver.StreamRequestHandler):
+    ops = (
+        "get_prefs",
+        "store_prefs",
+        "add_score",
+        "visited",
+        "progress",
+        "leaderboard",
+        "flush",
+    )
+
+    def handle(self):
+        store: ScoreStore = self.server.store
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                op = request.pop("op", None)
+                if op not in self.ops:
+                    raise ScoreServerError(f"Invalid op: {op!r}")
+                reply = json.dumps({"ok": getattr(store, op)(**request)})
+            except Exception as ex:  # Keep serving, client reports it.
+                reply = json.dumps({"error": f"{type(ex).__name__}: {ex}"})
+            self.wfile.write(reply.encode("utf-8") + b"\n")
+
+
+class ScoreServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, address, store: ScoreStore, flush_interval=5.0):
+        self.store = store
+        self.flush_interval = flush_interval
+        self._stop_flushing = threading.Event()
+        super().__init__(str(address), ScoreRequestHandler)
+
+    def _flush_loop(self):
+        while not self._stop_flushing.wait(self.flush_interval):
+            self.store.flush()
+
+    def serve_forever(self, *args, **kw):
+        flusher = threading.Thread(target=self._flush_loop, daemon=True)
+        flusher.start()
+        try:
+            super().serve_forever(*args, **kw)
+        finally:
+            self._stop_flushing.set()
+            flusher.join()
+            self.store.flush()
+
+
+class ScoreClient:
+    """The thin connection of a curses client to a :class:`ScoreServer`."""
+
+    def __init__(self, address, profile):
+        self.address = address
+        self.profile = profile
+        self.sock = self.rfile = None
+        self._connect()
+
+    def _connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            self.sock.connect(str(self.address))
+        except OSError:
+            self.close()
+            raise
+        self.rfile = self.sock.makefile("rb")
+
+    def call(self, op, **kw):
+        """
+        :raise ScoreServerError:
+            also for connection errors; the next call reconnects
+            (e.g. after a server restart).
+        """
+        request = json.dumps({"op": op, **kw}).encode("utf-8") + b"\n"
+        try:
+            if not self.sock:
+                self._connect()
+            self.sock.sendall(request)
+            line = self.rfile.readline()
+        except OSError as ex:
+            self.close()
+            raise ScoreServerError(f"Score-server '{self.address}': {ex}") from ex
+        if not line:
+            self.close()
+            raise ScoreServerError(f"Score-server '{self.address}' disconnected")
+        reply = json.loads(line)
+        if "error" in reply:
+            raise ScoreServerError(reply["error"])
+        return reply["ok"]
+
+    def get_prefs(self) -> dict:
+        return self.call("get_prefs", profile=self.profile)
+
+    def store_prefs(self, prefs: dict):
+        self.call("store_prefs", profile=self.profile, prefs=prefs)
+
+    def add_score(self, layout, lesson, score: dict):
+        self.call(
+            "add_score", profile=self.profile, layout=layout, lesson=lesson, score=score
+        )
+
+    def visited(self, layout) -> set[str]:
+        return set(self.call("visited", profile=self.profile, layout=layout))
+
+    def progress(self, layout, lesson) -> list:
+        return self.call("progress", profile=self.profile, layout=layout, lesson=lesson)
+
+    def leaderboard(self, layout, lesson, n=10) -> list:
+        return self.call("leaderboard", layout=layout, lesson=lesson, n=n)
+
+    def flush(self) -> int:
+        return self.call("flush")
+
+    def close(self):
+        if self.rfile:
+            self.rfile.close()
+        if self.sock:
+            self.sock.close()
+        self.sock = self.rfile = None
+
+
+def main(*args):
+    parser = argparse.ArgumentParser(
+        prog="workmanship-scoreserver", description=__doc__.strip().splitlines()[0]
+    )
+    parser.add_argument("socket", help="path of the Unix socket to listen to")
+    parser.add_argument(
+        "--datadir",
+        default=Path("~/.workmanship.d").expanduser(),
+        help="where to store profiles (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--flush-interval",
+        type=float,
+        default=5.0,
+        metavar="SEC",
+        help="seconds between writing modified profiles (default: %(default)s)",
+    )
+    opts = parser.parse_args(args[1:] if args else sys.argv[1:])
+
+    sock_path = Path(opts.socket)
+    if sock_path.exists():
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(str(sock_path))
+        except ConnectionRefusedError:
+            sock_path.unlink()  # Stale socket of a dead server.
+        else:
+            raise SystemExit(f"Score-server already listening on '{sock_path}'")
+        finally:
+            probe.close()
+
+    store = ScoreStore(opts.datadir)
+    with ScoreServer(sock_path, store, opts.flush_interval) as server:
+        print(
+            f"Serving x{len(store.profiles)} profiles from '{store.datadir}'"
+            f" on '{sock_path}'",
+            file=sys.stderr,
+        )
+        # Flush also when killed by daemon-managers.
+        signal.signal(signal.SIGTERM, signal.default_int_handler)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            sock_path.unlink(missing_ok=True)
+
+
+if __name__ == "__main__":
+    main(*sys.argv)
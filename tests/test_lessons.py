@@ -0,0 +1,359 @@
+import curses
+import datetime
+import threading
+
+import pytest
+
+from workmanship import lessons, profiling, recordings, scoreserver
+
+
+@pytest.fixture
+def prefs_fpath(tmp_path, monkeypatch):
+    fpath = tmp_path / "workmanship.yml"
+    monkeypatch.setattr(lessons, "prefs_fpath", fpath)
+    monkeypatch.setattr(lessons, "user_prefs", None)
+    monkeypatch.setattr(lessons, "selected_layout", "Dvorak")
+    monkeypatch.setattr(lessons, "unsent_scores", [])
+    monkeypatch.setattr(lessons, "user_nscores", 0)
+    return fpath
+
+
+def test_score_dict_roundtrip():
+    date = datetime.datetime(2023, 6, 6, 12, 30, 15, 250000)
+    d = {
+        "date": date,
+        "cps": 2.5,
+        "wpm": 30.0,
+        "hits_ratio": 0.9,
+        "elapsed": 12.0,
+        "hits": 30,
+        "misses": 3,
+    }
+    score = lessons.Score.from_dict(d)
+    assert score.date == date.timestamp()
+    assert score.hits == 30
+    assert score.to_dict() == d
+    assert not hasattr(score, "__dict__")
+
+
+def test_scores_store_load(prefs_fpath):
+    lessons.load_user_prefs({"Dvorak": {}})
+    assert lessons.user_prefs["game_scores"] == {}
+
+    stats = lessons.Stats(2.5, 30.0, 0.9, 12.0, 30, 3)
+    lessons.update_game_scores("UH", stats)
+    lessons.update_game_scores("UH", stats)
+    lessons.store_user_prefs()
+    stored = lessons.user_prefs["game_scores"]
+
+    lessons.load_user_prefs({"Dvorak": {}})
+    loaded = lessons.user_prefs["game_scores"]
+    # Dates roundtrip through datetimes with microsecond precision.
+    for exp, got in zip(stored["Dvorak"]["UH"], loaded["Dvorak"]["UH"], strict=True):
+        assert got.date == pytest.approx(exp.date, abs=1e-6)
+        assert got[1:] == exp[1:]
+    (score, _) = loaded["Dvorak"]["UH"]
+    assert isinstance(score, lessons.Score)
+    assert score[1:] == stats
+    assert "date:" in prefs_fpath.read_text()
+
+
+def test_scores_in_server(prefs_fpath, tmp_path, monkeypatch):
+    sock_path = tmp_path / "score.sock"
+    store = scoreserver.ScoreStore(tmp_path / "data")
+    with scoreserver.ScoreServer(sock_path, store) as server:
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        client = scoreserver.ScoreClient(sock_path, "ann")
+        monkeypatch.setattr(lessons, "score_client", client)
+        try:
+            lessons.load_user_prefs({"Dvorak": {}})
+            stats = lessons.Stats(2.5, 30.0, 0.9, 12.0, 30, 3)
+            lessons.update_game_scores("UH", stats)
+            assert "x1 new scores of 'ann'" in lessons.store_user_prefs()
+            assert "#1 ann WPM 30.00" in lessons.leaderboard_msg("UH")
+
+            layouts = {
+                "Dvorak": {
+                    "key": "d",
+                    "lessons": {
+                        "UH": lessons.make_lesson("uh"),
+                        "ET": lessons.make_lesson("et"),
+                    },
+                }
+            }
+            win = FakeWindow([])
+            assert lessons.lessons_menu(win, layouts) is None
+            styles = {txt.strip(): style for txt, style in win.labels}
+            assert styles["1 - UH"] == curses.A_UNDERLINE  # visited
+            assert styles["2 - ET"] == curses.A_NORMAL
+        finally:
+            client.close()
+            server.shutdown()
+            thread.join()
+
+    assert not prefs_fpath.exists()
+    store = scoreserver.ScoreStore(tmp_path / "data")
+    assert store.get_prefs("ann")["selected_layout"] == "Dvorak"
+    [(_date, wpm, hits_ratio)] = store.progress("ann", "Dvorak", "UH")
+    assert (wpm, hits_ratio) == (30.0, 0.9)
+
+
+def test_scores_resent_after_server_restart(prefs_fpath, tmp_path, monkeypatch):
+    sock_path = tmp_path / "score.sock"
+    datadir = tmp_path / "data"
+
+    def start_server():
+        server = scoreserver.ScoreServer(sock_path, scoreserver.ScoreStore(datadir))
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        return server, thread
+
+    def stop_server(server, thread):
+        server.shutdown()
+        thread.join()
+        server.server_close()
+        sock_path.unlink()
+
+    server, thread = start_server()
+    client = scoreserver.ScoreClient(sock_path, "ann")
+    monkeypatch.setattr(lessons, "score_client", client)
+    try:
+        lessons.load_user_prefs({"Dvorak": {}})
+        stop_server(server, thread)
+        client.close()  # as when the server process dies
+
+        stats = lessons.Stats(2.5, 30.0, 0.9, 12.0, 30, 3)
+        with pytest.raises(scoreserver.ScoreServerError):
+            lessons.update_game_scores("UH", stats)  # lesson ended
+        assert len(lessons.unsent_scores) == 1
+
+        server, thread = start_server()
+        assert "x1 new scores of 'ann'" in lessons.store_user_prefs()
+        assert lessons.unsent_scores == []
+        [(_date, wpm, _ratio)] = server.store.progress("ann", "Dvorak", "UH")
+        assert wpm == 30.0
+    finally:
+        client.close()
+        stop_server(server, thread)
+
+
+def test_score_server_down(prefs_fpath, tmp_path, monkeypatch):
+    client = scoreserver.ScoreClient.__new__(scoreserver.ScoreClient)
+    client.address, client.profile = tmp_path / "missing.sock", "ann"
+    client.sock = client.rfile = None
+    lessons.load_user_prefs({"Dvorak": {}})
+    monkeypatch.setattr(lessons, "score_client", client)
+    with pytest.raises(scoreserver.ScoreServerError):
+        lessons.load_user_prefs({"Dvorak": {}})  # `main()` exits
+
+    layouts = {"Dvorak": {"key": "d", "lessons": {"UH": lessons.make_lesson("uh")}}}
+    win = FakeWindow([])
+    assert lessons.lessons_menu(win, layouts) is None
+    assert any("Score-server failed" in txt for txt, _style in win.labels)
+
+    msg, style = lessons.store_user_prefs_cb(None)
+    assert "Score-server failed" in msg
+
+
+def test_ctrl_c_with_score_server(prefs_fpath, tmp_path, monkeypatch):
+    sock_path = tmp_path / "score.sock"
+    store = scoreserver.ScoreStore(tmp_path / "data")
+    monkeypatch.setattr(lessons, "score_client", None)
+    monkeypatch.setattr(lessons, "recordings_archive", None)
+    monkeypatch.setattr(lessons, "recordings_fpath", tmp_path / "workmanship.rec")
+
+    def interrupted(func, *args):
+        lessons.update_game_scores("UH", lessons.Stats(2.5, 30.0, 0.9, 12.0, 30, 3))
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(curses, "wrapper", interrupted)
+    with scoreserver.ScoreServer(sock_path, store) as server:
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            with pytest.raises(SystemExit, match="x0 unsent scores") as exinfo:
+                lessons.main("workmanship", "--score-server", str(sock_path))
+        finally:
+            server.shutdown()
+            thread.join()
+    assert "new scores in prefs" not in str(exinfo.value)
+    assert len(store.progress(lessons.score_client.profile, "Dvorak", "UH")) == 1
+
+
+def test_corrupt_recordings_archive(prefs_fpath, tmp_path, monkeypatch, capsys):
+    rec_fpath = tmp_path / "workmanship.rec"
+    rec_fpath.write_bytes(b"garbage")
+    monkeypatch.setattr(lessons, "recordings_archive", None)
+    monkeypatch.setattr(lessons, "recordings_fpath", rec_fpath)
+    archives = []
+    monkeypatch.setattr(
+        curses, "wrapper", lambda *args: archives.append(lessons.recordings_archive)
+    )
+    lessons.main("workmanship")
+    assert archives == [None]
+    assert "Invalid recordings archive" in capsys.readouterr().err
+
+
+def test_recording_failed(prefs_fpath, tmp_path, monkeypatch):
+    archive = recordings.Archive(tmp_path / "missing" / "workmanship.rec")
+    monkeypatch.setattr(lessons, "recordings_archive", archive)
+    stats = lessons.Stats(2.5, 30.0, 0.9, 12.0, 30, 3)
+    monkeypatch.setattr(lessons, "run_typing_lesson", lambda *args, **kw: stats)
+    lessons.load_user_prefs({"Dvorak": {}})
+
+    win = FakeWindow([])
+    lessons.play_lesson(win, "UH", lessons.make_lesson("uh"))
+    assert any("Recording not saved" in txt for txt, _style in win.labels)
+    assert lessons.user_nscores == 1  # scored before recording
+
+
+def test_player_recordings_fpath(monkeypatch):
+    assert lessons.player_recordings_fpath() == lessons.recordings_fpath
+    client = scoreserver.ScoreClient.__new__(scoreserver.ScoreClient)
+    client.profile = "ann"
+    monkeypatch.setattr(lessons, "score_client", client)
+    fpath = lessons.player_recordings_fpath()
+    assert fpath.name == ".workmanship.ann.rec"
+    assert fpath.parent == lessons.recordings_fpath.parent
+
+
+def test_make_lesson():
+    lesson = lessons.make_lesson("\n  ab ab\n ba  \n")
+    assert lesson.lines == ["ab ab\n", "ba\n"]
+    assert lesson.nchars == 9
+    assert lesson.keys == {"a", "b", " ", "\n"}
+    assert lesson.duration == pytest.approx(9 / lessons.REFERENCE_CPS)
+
+
+@pytest.mark.parametrize(
+    "easy, hard",
+    [
+        ("aaaa", "abab"),
+        ("abab", "abcd"),
+        ("uuuu hhhh", "hue the hut"),
+    ],
+)
+def test_lesson_difficulty(easy, hard):
+    assert lessons.make_lesson(easy).difficulty < lessons.make_lesson(hard).difficulty
+
+
+def test_index_lessons():
+    layouts = lessons.index_lessons(lessons.load_lessons()["layouts"])
+    for layout in layouts.values():
+        for lesson in layout["lessons"].values():
+            assert isinstance(lesson, lessons.Lesson)
+            assert lesson.nchars == sum(len(l) for l in lesson.lines)
+
+
+@pytest.mark.parametrize(
+    "elapsed, exp",
+    [
+        (0, (2, 0)),
+        (1.0, (2, 1)),
+        (2.5, (2, 2)),
+        (3.0, (3, 0)),  # "ab\n" typed
+        (4.0, (3, 1)),
+        (5.0, None),  # finished
+    ],
+)
+def test_ghost_locate(elapsed, exp):
+    lesson = lessons.make_lesson("ab\nc")
+    timeline = [(1.0, True), (1.5, False), (2.0, True), (3.0, True), (4.0, True)]
+    timeline.append((5.0, True))
+    recording = recordings.Recording(0, 5, 5, 1, recordings.encode_timeline(timeline))
+    ghost = lessons.Ghost(None, recording, lesson.lines, 2)
+    assert ghost.locate(elapsed) == exp
+
+
+class FakeWindow:
+    """Replays scripted keys, `None` for `get_wch()` timeouts."""
+
+    def __init__(self, keys):
+        self.keys = list(keys)
+        self.chgats = []
+        self.timeouts = []
+        self.labels = []
+
+    def get_wch(self):
+        key = self.keys.pop(0)
+        if key is None:
+            raise curses.error("no input")
+        return key
+
+    def getmaxyx(self):
+        return (25, 80)
+
+    def chgat(self, y, x, n, attr):
+        self.chgats.append((y, x, attr))
+
+    def timeout(self, delay):
+        self.timeouts.append(delay)
+
+    def addstr(self, *args):
+        if len(args) in (2, 4):  # [y, x,] text, style
+            self.labels.append(args[-2:])
+
+    def getstr(self):
+        return b""
+
+    def __getattr__(self, name):
+        return lambda *args: None
+
+
+@pytest.fixture
+def fake_curses(monkeypatch):
+    for name in ("noecho", "curs_set", "beep"):
+        monkeypatch.setattr(curses, name, lambda *args: None)
+
+
+def test_run_typing_lesson_timeline(fake_curses):
+    lesson = lessons.make_lesson("ab")
+    win = FakeWindow(["x", "a", "x", "b", "\n", "x"])
+    timeline = []
+    stats = lessons.run_typing_lesson(win, "AB", lesson, timeline)
+    assert (stats.hits, stats.misses) == (3, 1)  # 1st key just starts
+    assert [hit for _t, hit in timeline] == [True, False, True, True]
+    assert win.timeouts == [-1]
+
+
+def test_run_typing_lesson_key_echo_timer(fake_curses, monkeypatch):
+    monkeypatch.setattr(profiling, "enabled", True)
+    samples = profiling.timings[profiling.KEY_ECHO]
+    samples.clear()
+    lesson = lessons.make_lesson("ab")
+    win = FakeWindow(["x", "a", "x", "b", "\n", "x"])
+    lessons.run_typing_lesson(win, "AB", lesson)
+    assert len(samples) == 4  # all but 1st (start) & last (exit) keys
+    samples.clear()
+
+
+def test_run_typing_lesson_curses_calls(fake_curses, monkeypatch):
+    monkeypatch.setattr(profiling, "enabled", True)
+    profiling.reset()
+    lesson = lessons.make_lesson("ab")
+    win = profiling.CountingWindow(FakeWindow(["x", "a", "x", "b", "\n", "x"]))
+    lessons.run_typing_lesson(win, "AB", lesson)
+    assert profiling.curses_calls["get_wch"] == 5  # not the 1st (start) key
+    assert not profiling.counting
+    profiling.reset()
+
+
+def test_run_typing_lesson_error_without_ghost(fake_curses):
+    lesson = lessons.make_lesson("ab")
+    win = FakeWindow(["x", None])
+    with pytest.raises(curses.error, match="no input"):
+        lessons.run_typing_lesson(win, "AB", lesson)
+
+
+def test_run_typing_lesson_ghost(fake_curses):
+    lesson = lessons.make_lesson("ab")
+    timeline = [(0.0, True), (100.0, True), (100.0, True)]
+    ghost = recordings.Recording(0, 0, 3, 0, recordings.encode_timeline(timeline))
+    win = FakeWindow(["x", None, "a", "b", "\n", "x"])
+    stats = lessons.run_typing_lesson(win, "AB", lesson, ghost=ghost)
+    assert stats.hits == 3
+    assert win.timeouts == [round(lessons.GHOST_TICK * 1000), -1]
+    # Ghost ahead by 1 char, till user's cursor catches it.
+    assert (2, 1, curses.A_UNDERLINE) in win.chgats
+    assert (2, 1, curses.A_REVERSE) in win.chgats
@@ -0,0 +1,91 @@
+import pytest
+
+from workmanship import profiling
+
+
+@pytest.fixture(autouse=True)
+def _reset():
+    profiling.reset()
+    yield
+    profiling.reset()
+
+
+@pytest.mark.parametrize(
+    "samples, pct, exp",
+    [
+        ([], 50, 0),
+        ([7], 50, 7),
+        ([7], 99, 7),
+        ([3, 1, 2], 50, 2),
+        (list(range(1, 101)), 50, 50),
+        (list(range(1, 101)), 99, 99),
+        (list(range(1, 101)), 100, 100),
+    ],
+)
+def test_percentile(samples, pct, exp):
+    assert profiling.percentile(samples, pct) == exp
+
+
+def test_timed():
+    @profiling.timed
+    def f(x):
+        return x * 2
+
+    assert f(3) == 6
+    assert f(4) == 8
+    samples = profiling.timings[f.__qualname__]
+    assert len(samples) == 2
+    assert "f" in profiling.summary()
+
+    profiling.reset()
+    f(1)
+    assert len(samples) == 1
+
+
+def test_counting_window(monkeypatch):
+    monkeypatch.setattr(profiling, "enabled", True)
+
+    class Win:
+        maxy = 3
+
+        def get_wch(self):
+            return "a"
+
+        def chgat(self, *args):
+            pass
+
+    win = profiling.CountingWindow(Win())
+    assert win.maxy == 3
+    win.get_wch()  # e.g. in menus
+    with profiling.counting_curses():
+        assert win.get_wch() == "a"
+        win.chgat(0, 0, 1)
+        win.chgat(0, 1, 1)
+    win.chgat(0, 2, 1)
+    assert profiling.curses_calls == {"get_wch": 1, "chgat": 2}
+    assert win.chgat is win.chgat  # wrapper cached
+    assert "curses calls per keystroke: 3.0" in profiling.summary()
+
+
+def test_counted():
+    @profiling.counted
+    def g():
+        return 1
+
+    assert g() + g() == 2
+    assert profiling.calls[g.__qualname__] == 2
+    assert "p50" not in [l for l in profiling.summary().splitlines() if "g" in l][-1]
+
+
+def test_sampler(monkeypatch):
+    assert profiling.sampler("x") is None
+    monkeypatch.setattr(profiling, "enabled", True)
+    samples = profiling.sampler("x")
+    samples.append(2_000_000)
+    assert profiling.timings["x"] is samples
+    assert "2.000" in profiling.summary()
+
+
+def test_counting_curses_disabled():
+    with profiling.counting_curses():
+        assert not profiling.counting
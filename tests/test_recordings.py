@@ -0,0 +1,97 @@
+import pytest
+
+from workmanship import recordings
+
+
+@pytest.mark.parametrize(
+    "timeline",
+    [
+        [],
+        [(0.0, True)],
+        [(0.1, True), (0.25, False), (0.25, True), (3.0, True)],
+        [(i / 1000, i % 3 != 0) for i in range(1, 500, 7)],
+        [(100.0, True), (7200.5, False)],  # multi-byte varints
+    ],
+)
+def test_timeline_roundtrip(timeline):
+    events = recordings.encode_timeline(timeline)
+    assert list(recordings.decode_timeline(events)) == timeline
+    assert list(recordings.decode_timeline(memoryview(events))) == timeline
+
+
+def test_timeline_compact():
+    timeline = [(0.2 * i, True) for i in range(1, 1001)]
+    assert len(recordings.encode_timeline(timeline)) == 2 * len(timeline)
+
+
+def _recording(elapsed, timeline=((0.5, True), (1.0, False))):
+    return recordings.Recording(
+        1.0, elapsed, 1, 1, recordings.encode_timeline(timeline)
+    )
+
+
+def test_archive(tmp_path):
+    fpath = tmp_path / "scores.rec"
+    archive = recordings.Archive(fpath)
+    assert archive.best_of("Dvorak", "UH") is None
+
+    archive.append("Dvorak", "UH", _recording(20))
+    archive.append("Dvorak", "UH", _recording(10, [(0.25, True)]))
+    archive.append("Dvorak", "UH", _recording(30))
+    archive.append("Workman", "UH", _recording(40))
+    assert archive.best_of("Dvorak", "UH").elapsed == 10
+
+    archive = recordings.Archive(fpath)
+    best = archive.best_of("Dvorak", "UH")
+    assert best.elapsed == 10
+    assert isinstance(best.events, memoryview)
+    assert list(best.timeline()) == [(0.25, True)]
+    assert archive.best_of("Workman", "UH").elapsed == 40
+    assert archive.best_of("Workman", "ET") is None
+
+
+def test_archive_truncated(tmp_path):
+    fpath = tmp_path / "scores.rec"
+    archive = recordings.Archive(fpath)
+    archive.append("Dvorak", "UH", _recording(20))
+    with open(fpath, "ab") as f:
+        f.write(b"\0" * (recordings.HEADER.size + 3))  # crashed half-way
+
+    archive = recordings.Archive(fpath)
+    assert archive.best_of("Dvorak", "UH").elapsed == 20
+    archive.append("Dvorak", "UH", _recording(10))
+
+    archive = recordings.Archive(fpath)
+    assert archive.best_of("Dvorak", "UH").elapsed == 10
+
+
+def test_archive_invalid(tmp_path):
+    fpath = tmp_path / "scores.rec"
+    fpath.write_bytes(b"garbage")
+    with pytest.raises(ValueError, match="Invalid recordings"):
+        recordings.Archive(fpath)
+
+
+def test_archive_concurrent_sessions(tmp_path):
+    fpath = tmp_path / "scores.rec"
+    recordings.Archive(fpath).append("Dvorak", "ET", _recording(50))
+    a = recordings.Archive(fpath)
+    b = recordings.Archive(fpath)
+    b.append("Dvorak", "UH", _recording(10))
+    a.append("Dvorak", "ET", _recording(20))
+    assert a.best_of("Dvorak", "UH").elapsed == 10  # indexed b's recording
+
+    archive = recordings.Archive(fpath)
+    assert archive.best_of("Dvorak", "UH").elapsed == 10
+    assert archive.best_of("Dvorak", "ET").elapsed == 20
+
+
+def test_archive_created_by_other_session(tmp_path):
+    fpath = tmp_path / "scores.rec"
+    a = recordings.Archive(fpath)
+    recordings.Archive(fpath).append("Dvorak", "UH", _recording(10))
+    a.append("Dvorak", "ET", _recording(20))
+
+    archive = recordings.Archive(fpath)
+    assert archive.best_of("Dvorak", "UH").elapsed == 10
+    assert archive.best_of("Dvorak", "ET").elapsed == 20
@@ -0,0 +1,178 @@
+import datetime
+import socket
+import threading
+
+import pytest
+from ruamel.yaml import YAML
+
+from workmanship import scoreserver
+
+
+def _score(wpm, date=1.0):
+    return {
+        "date": date,
+        "cps": wpm / 12,
+        "wpm": wpm,
+        "hits_ratio": 0.9,
+        "elapsed": 10.0,
+        "hits": 30,
+        "misses": 3,
+    }
+
+
+def test_store_flush_reload(tmp_path):
+    store = scoreserver.ScoreStore(tmp_path)
+    store.store_prefs("ann", {"beep_on_errors": True, "game_scores": "ignored"})
+    store.add_score("ann", "Dvorak", "UH", _score(30))
+    store.add_score("bob", "Dvorak", "UH", _score(40))
+    store.add_score("bob", "Dvorak", "UH", _score(20))
+    store.add_score("bob", "Dvorak", "ET", _score(50))
+    assert store.flush() == 2
+    assert store.flush() == 0
+    stored = YAML(typ="safe").load(tmp_path / "ann.yml")
+    [score] = stored["game_scores"]["Dvorak"]["UH"]
+    assert isinstance(score["date"], datetime.datetime)  # as in prefs-file
+
+    store = scoreserver.ScoreStore(tmp_path)
+    assert store.get_prefs("ann") == {"beep_on_errors": True}
+    assert store.visited("bob", "Dvorak") == ["UH", "ET"]
+    assert store.visited("bob", "Workman") == []
+    assert store.progress("bob", "Dvorak", "UH") == [(1.0, 40, 0.9), (1.0, 20, 0.9)]
+    assert all(
+        isinstance(score, scoreserver.Score)
+        for score in store.profiles["bob"]["game_scores"]["Dvorak"]["UH"]
+    )
+    assert store.leaderboard("Dvorak", "UH") == [("bob", 40, 0.9), ("ann", 30, 0.9)]
+    assert store.leaderboard("Dvorak", "UH", n=1) == [("bob", 40, 0.9)]
+
+
+@pytest.mark.parametrize("profile", ["", ".hidden", "a/b", "../x", 12])
+def test_store_bad_profile(tmp_path, profile):
+    store = scoreserver.ScoreStore(tmp_path)
+    with pytest.raises(scoreserver.ScoreServerError, match="Invalid profile"):
+        store.get_prefs(profile)
+
+
+def test_store_prefs_file_dates(tmp_path):
+    date = datetime.datetime(2023, 6, 6, 12, 30)
+    (tmp_path / "ann.yml").write_text(
+        "game_scores:\n  Dvorak:\n    UH:\n"
+        f"    - {{date: {date}, cps: 2.5, wpm: 30.0, hits_ratio: 0.9,"
+        " elapsed: 10.0, hits: 30, misses: 3}\n"
+    )
+    store = scoreserver.ScoreStore(tmp_path)
+    assert store.progress("ann", "Dvorak", "UH") == [(date.timestamp(), 30.0, 0.9)]
+
+
+@pytest.mark.parametrize(
+    "score",
+    [
+        {"wpm": 30},
+        [1, 2],
+        "bad",
+        {**_score(30), "wpm": "fast"},
+        {**_score(30), "hits": None},
+        {**_score(30), "misses": True},
+        {**_score(30), "cps": float("nan")},
+    ],
+)
+def test_store_bad_score(tmp_path, score):
+    store = scoreserver.ScoreStore(tmp_path)
+    store.add_score("bob", "Dvorak", "UH", _score(40))
+    with pytest.raises(scoreserver.ScoreServerError, match="Invalid score"):
+        store.add_score("ann", "Dvorak", "UH", score)
+    assert store.leaderboard("Dvorak", "UH") == [("bob", 40, 0.9)]
+
+
+def test_client_server(tmp_path):
+    store = scoreserver.ScoreStore(tmp_path / "data")
+    sock_path = tmp_path / "score.sock"
+    with scoreserver.ScoreServer(sock_path, store, flush_interval=60) as server:
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            ann = scoreserver.ScoreClient(sock_path, "ann")
+            bob = scoreserver.ScoreClient(sock_path, "bob")
+            ann.add_score("Dvorak", "UH", _score(30))
+            bob.add_score("Dvorak", "UH", _score(40))
+            ann.store_prefs({"selected_layout": "Dvorak"})
+
+            assert ann.get_prefs() == {"selected_layout": "Dvorak"}
+            assert bob.get_prefs() == {}
+            assert ann.visited("Dvorak") == {"UH"}
+            assert ann.leaderboard("Dvorak", "UH") == [
+                ["bob", 40, 0.9],
+                ["ann", 30, 0.9],
+            ]
+            assert ann.flush() == 2
+            assert (tmp_path / "data" / "ann.yml").exists()
+
+            with pytest.raises(scoreserver.ScoreServerError, match="Invalid op"):
+                ann.call("__init__")
+            with pytest.raises(scoreserver.ScoreServerError, match="TypeError"):
+                ann.call("visited", profile="ann")
+            bad_score = scoreserver.Score(object(), 1, 1, 1, 1, 1, 1)
+            store.profiles["ann"]["game_scores"]["Dvorak"]["ET"] = [bad_score]
+            with pytest.raises(scoreserver.ScoreServerError, match="TypeError"):
+                ann.progress("Dvorak", "ET")  # unserializable reply
+            assert ann.visited("Dvorak") == {"UH", "ET"}  # still serving
+            del store.profiles["ann"]["game_scores"]["Dvorak"]["ET"]  # unstorable
+            ann.close()
+            bob.close()
+        finally:
+            server.shutdown()
+            thread.join()
+
+
+def test_client_reconnects(tmp_path):
+    sock_path = tmp_path / "score.sock"
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(str(sock_path))
+    listener.listen()
+    client = scoreserver.ScoreClient(sock_path, "ann")
+    conn, _ = listener.accept()
+    conn.close()  # server died
+    listener.close()
+    sock_path.unlink()
+
+    with pytest.raises(scoreserver.ScoreServerError, match="score.sock"):
+        client.visited("Dvorak")
+    with pytest.raises(scoreserver.ScoreServerError, match="score.sock"):
+        client.visited("Dvorak")  # still down
+
+    store = scoreserver.ScoreStore(tmp_path / "data")
+    with scoreserver.ScoreServer(sock_path, store) as server:
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            assert client.visited("Dvorak") == set()  # restarted
+            client.close()
+        finally:
+            server.shutdown()
+            thread.join()
+
+
+def test_flush_not_blocking_requests(tmp_path, monkeypatch):
+    store = scoreserver.ScoreStore(tmp_path)
+    store.add_score("ann", "Dvorak", "UH", _score(30))
+
+    writing, finish = threading.Event(), threading.Event()
+    dump = YAML.dump
+
+    def slow_dump(self, data, stream):
+        writing.set()
+        finish.wait(5)
+        dump(self, data, stream)
+
+    monkeypatch.setattr(YAML, "dump", slow_dump)
+    flusher = threading.Thread(target=store.flush)
+    flusher.start()
+    assert writing.wait(5)
+    store.add_score("ann", "Dvorak", "UH", _score(40))  # not blocked by writing
+    assert store.visited("ann", "Dvorak") == ["UH"]
+    finish.set()
+    flusher.join()
+
+    assert store.dirty == {"ann"}  # 2nd score flushed next time
+    [score] = scoreserver.ScoreStore(tmp_path).progress("ann", "Dvorak", "UH")
+    assert score[1] == 30